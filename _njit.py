@@ -0,0 +1,17 @@
+"""Optional numba: njit/prange fall back to plain Python when it is missing"""
+
+try:
+    import numba
+
+    HAVE_NUMBA = True
+    njit = numba.njit
+    prange = numba.prange
+except ImportError:
+    HAVE_NUMBA = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit (bare or with signature/options)"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
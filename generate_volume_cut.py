@@ -1,7 +1,6 @@
 import pandas as pd
-import os
-from pathlib import Path
-from datetime import datetime
+import csv
+from universe import load_universe, rolling_mean
 
 print("="*70)
 print("VOLUME CUT GENERATOR")
@@ -23,50 +22,26 @@ ROLLING_WINDOW = 20
 # Output file name
 OUTPUT_FILE = 'volume_cut.csv'
 
+# Print progress every 12 month-ends
+VERBOSE = False
+
 # ============================================================================
 # STEP 1: Read all stock CSV files
 # ============================================================================
 print(f"\n📁 Reading stock data from: {DATA_FOLDER}")
 
-csv_files = list(Path(DATA_FOLDER).glob('*.csv'))
-
-# Filter out non-stock files
-stock_files = [
-    f for f in csv_files
-    if f.stem not in ['NIFTY500_INDEX', 'summary_report', 'combined_data']
-]
-
-print(f"✓ Found {len(stock_files)} stock CSV files")
-
-# Dictionary to store stock data
-stock_data = {}
-
-print("\n📊 Loading stock data...")
-for i, csv_file in enumerate(stock_files, 1):
-    stock_name = csv_file.stem
+# Wide (dates x symbols) arrays, shared with the other pipeline scripts
+universe = load_universe(DATA_FOLDER)
 
-    try:
-        # Read CSV with datetime index
-        df = pd.read_csv(csv_file, index_col='datetime', parse_dates=True)
-
-        if 'volume' in df.columns and not df.empty:
-            stock_data[stock_name] = df[['volume']].copy()
-
-            if i % 50 == 0:
-                print(f"   Loaded {i}/{len(stock_files)} stocks...")
-    except Exception as e:
-        print(f"   ⚠ Error loading {stock_name}: {e}")
-
-print(f"✓ Successfully loaded {len(stock_data)} stocks with volume data")
+print(f"✓ Successfully loaded {len(universe.symbols)} stocks with volume data")
 
 # ============================================================================
 # STEP 2: Calculate 20-day rolling average volume for each stock
 # ============================================================================
 print(f"\n📈 Calculating {ROLLING_WINDOW}-day rolling average volume...")
 
-for stock_name, df in stock_data.items():
-    # Calculate 20-day rolling average
-    df['avg_volume_20d'] = df['volume'].rolling(window=ROLLING_WINDOW).mean()
+# Single rolling pass over all stocks at once
+avg20 = rolling_mean(universe.volumes, ROLLING_WINDOW)
 
 print("✓ Rolling averages calculated")
 
@@ -75,21 +50,9 @@ print("✓ Rolling averages calculated")
 # ============================================================================
 print("\n📅 Identifying month-end trading days...")
 
-# Get all unique dates from all stocks
-all_dates = set()
-for df in stock_data.values():
-    all_dates.update(df.index)
-
-all_dates = sorted(all_dates)
-
-# Convert to DataFrame for easier manipulation
-date_df = pd.DataFrame({'date': all_dates})
-date_df['date'] = pd.to_datetime(date_df['date'])
-date_df = date_df.set_index('date')
-
-# Group by year-month and get the last trading day of each month
-month_ends = date_df.groupby(date_df.index.to_period('M')).apply(lambda x: x.index.max())
-month_end_dates = sorted(month_ends.values)
+# Last trading day of each month, precomputed on the sorted union of dates
+month_end_rows = universe.month_end_rows
+month_end_dates = universe.dates[month_end_rows]
 
 print(f"✓ Found {len(month_end_dates)} month-end trading days")
 print(f"  Date range: {pd.Timestamp(month_end_dates[0]).date()} to {pd.Timestamp(month_end_dates[-1]).date()}")
@@ -99,46 +62,36 @@ print(f"  Date range: {pd.Timestamp(month_end_dates[0]).date()} to {pd.Timestamp
 # ============================================================================
 print(f"\n🔍 Filtering stocks with avg volume > {VOLUME_THRESHOLD:,} on month-ends...")
 
-results = []
+# One vectorized comparison for all (month-end, stock) pairs; no separate
+# notna test is needed since NaN > x is False under IEEE comparison
+bool_mat = avg20[month_end_rows] > VOLUME_THRESHOLD
+cols = universe.symbols
 
-for i, month_end_date in enumerate(month_end_dates, 1):
-    # List to store stocks that pass the filter on this date
-    passing_stocks = []
+# Per-month counts kept for the summary (the stock lists are only written)
+summary_rows = []
 
-    for stock_name, df in stock_data.items():
-        # Check if this date exists in the stock's data
-        if month_end_date in df.index:
-            avg_volume = df.loc[month_end_date, 'avg_volume_20d']
+# Stream each month-end row straight to the output file
+print(f"\n💾 Writing {OUTPUT_FILE}...")
+with open(OUTPUT_FILE, 'w', newline='') as fh:
+    writer = csv.writer(fh, lineterminator='\n')
+    writer.writerow(['date', 'stocks', 'count'])
 
-            # Check if avg volume exceeds threshold (and not NaN)
-            if pd.notna(avg_volume) and avg_volume > VOLUME_THRESHOLD:
-                passing_stocks.append(stock_name)
+    for i, month_end_date in enumerate(month_end_dates):
+        passing_stocks = cols[bool_mat[i].nonzero()[0]]
+        date_str = month_end_date.strftime('%Y-%m-%d')
 
-    # Add to results
-    results.append({
-        'date': pd.Timestamp(month_end_date).strftime('%Y-%m-%d'),
-        'stocks': ', '.join(sorted(passing_stocks)),
-        'count': len(passing_stocks)
-    })
+        # Symbols are pre-sorted, so the mask already yields sorted names
+        writer.writerow([date_str, ', '.join(passing_stocks.tolist()), len(passing_stocks)])
+        summary_rows.append({'date': date_str, 'count': len(passing_stocks)})
 
-    if i % 12 == 0:
-        print(f"   Processed {i}/{len(month_end_dates)} month-ends...")
+        if VERBOSE and (i + 1) % 12 == 0:
+            print(f"   Processed {i + 1}/{len(month_end_dates)} month-ends...")
 
 print(f"✓ Processed all {len(month_end_dates)} month-end dates")
-
-# ============================================================================
-# STEP 5: Generate volume_cut.csv
-# ============================================================================
-print(f"\n💾 Generating {OUTPUT_FILE}...")
-
-# Create DataFrame
-result_df = pd.DataFrame(results)
-
-# Save to CSV
-result_df.to_csv(OUTPUT_FILE, index=False)
-
 print(f"✓ {OUTPUT_FILE} created successfully!")
 
+result_df = pd.DataFrame(summary_rows)
+
 # ============================================================================
 # SUMMARY
 # ============================================================================
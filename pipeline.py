@@ -0,0 +1,125 @@
+import numpy as np
+import csv
+from universe import (
+    load_universe, load_sma_angle, load_index_close, find_first_valid_date,
+    compute_volume_mask, compute_angle_mask, compute_rs_topk, format_rs_picks
+)
+
+print("="*70)
+print("VOLUME -> SMA ANGLE -> RELATIVE STRENGTH PIPELINE")
+print("="*70)
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Folder containing stock CSV files
+DATA_FOLDER = 'nifty_data_2015-01-01_to_2024-12-31_20251016_015948'
+
+# Nifty 500 Index CSV file
+NIFTY_INDEX_FILE = 'nifty_data_2015-01-01_to_2024-12-31_20251016_022023/NIFTY500_INDEX.csv'
+
+# Volume threshold (1 million = 10 lakh)
+VOLUME_THRESHOLD = 1000000
+
+# Rolling window for average volume (20 trading days)
+ROLLING_WINDOW = 20
+
+# SMA periods
+SMA_200_WINDOW = 200
+SMA_50_WINDOW = 50
+
+# Angle threshold (degrees)
+ANGLE_THRESHOLD = 0.2
+
+# Number of top stocks to select
+TOP_N = 30
+
+# Lookback period for relative strength (months)
+LOOKBACK_MONTHS = 1
+
+# Output file name
+OUTPUT_FILE = 'pipeline_rank.csv'
+
+# ============================================================================
+# STEP 1: Read stock and index data
+# ============================================================================
+print(f"\n📁 Reading stock data from: {DATA_FOLDER}")
+
+# Wide (dates x symbols) arrays, loaded once for every stage
+universe = load_universe(DATA_FOLDER)
+stock_cols = universe.symbols
+
+print(f"✓ Successfully loaded {len(stock_cols)} stocks")
+
+print(f"\n📁 Reading Nifty 500 Index data from {NIFTY_INDEX_FILE}...")
+nifty_close = load_index_close(NIFTY_INDEX_FILE)
+print(f"✓ Loaded Nifty 500 Index data")
+
+# ============================================================================
+# STEP 2: Month-ends after 200 days of data
+# ============================================================================
+print(f"\n📅 Identifying month-end trading days...")
+
+# Month-ends from the first date any stock has a 200 SMA (as in sma_angle_cut.py)
+ma50, ma200, angle = load_sma_angle(DATA_FOLDER, SMA_50_WINDOW, SMA_200_WINDOW)
+first_valid_date = find_first_valid_date(ma200, universe.dates)
+month_end_rows = universe.month_end_rows
+month_end_rows = month_end_rows[universe.dates[month_end_rows] >= first_valid_date]
+month_end_dates = universe.dates[month_end_rows]
+
+print(f"✓ Found {len(month_end_rows)} valid month-end trading days")
+
+# ============================================================================
+# STEP 3: Volume cut, SMA angle cut and RS ranking in memory
+# ============================================================================
+print(f"\n🔍 Volume cut: avg {ROLLING_WINDOW}-day volume > {VOLUME_THRESHOLD:,}")
+vol_mask = compute_volume_mask(universe.volumes, month_end_rows, ROLLING_WINDOW, VOLUME_THRESHOLD)
+
+print(f"🔍 SMA angle cut: angle > {ANGLE_THRESHOLD}°, close > 50 & 200 SMA")
+ang_mask = vol_mask & compute_angle_mask(
+    universe.closes, ma50, ma200, angle, month_end_rows, ANGLE_THRESHOLD
+)
+
+print(f"📈 Relative strength: top {TOP_N} vs Nifty 500 over {LOOKBACK_MONTHS} months")
+picks = compute_rs_topk(
+    universe.closes, universe.dates, month_end_rows, ang_mask,
+    nifty_close, LOOKBACK_MONTHS, TOP_N
+)
+
+# ============================================================================
+# STEP 4: Write the final ranking
+# ============================================================================
+print(f"\n💾 Writing {OUTPUT_FILE}...")
+
+stock_counts = []
+with open(OUTPUT_FILE, 'w', newline='') as fh:
+    writer = csv.writer(fh, lineterminator='\n')
+    writer.writerow(['date', 'stocks'])
+
+    for month_end_date, (top_cols, top_rs) in zip(month_end_dates, picks):
+        # Format output: "STOCK1 (ratio), STOCK2 (ratio), ..."
+        formatted_stocks = format_rs_picks(stock_cols, top_cols, top_rs)
+        writer.writerow([month_end_date.strftime('%Y-%m-%d'), formatted_stocks])
+        stock_counts.append(len(top_cols))
+
+print(f"✓ {OUTPUT_FILE} created successfully!")
+
+# ============================================================================
+# SUMMARY
+# ============================================================================
+stock_counts = np.array(stock_counts)
+
+print("\n" + "="*70)
+print("SUMMARY")
+print("="*70)
+print(f"\n📊 Total month-end dates: {len(month_end_rows)}")
+if len(month_end_rows):
+    print(f"📊 Date range: {month_end_dates[0].date()} to {month_end_dates[-1].date()}")
+    print(f"📊 Volume cut: {vol_mask.sum(axis=1).mean():.1f} stocks per month")
+    print(f"📊 SMA angle cut: {ang_mask.sum(axis=1).mean():.1f} stocks per month")
+    print(f"📊 RS ranking: {stock_counts.mean():.1f} stocks per month")
+
+print("\n" + "="*70)
+print(f"✓ DONE! Check {OUTPUT_FILE} for full results")
+print("="*70)
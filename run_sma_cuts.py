@@ -0,0 +1,21 @@
+import runpy
+
+print("="*70)
+print("200 SMA CUT + SMA ANGLE CUT")
+print("="*70)
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Cut scripts to run, in order (each writes its own output CSV)
+CUT_SCRIPTS = ['sma_cut.py', 'sma_angle_cut.py']
+
+# ============================================================================
+# Run both cuts in one process
+# ============================================================================
+# load_universe() and load_sma_angle() are memoized per process, so the
+# stock data is read and the SMA/angle kernel runs once for both cuts
+for script in CUT_SCRIPTS:
+    print(f"\n▶ Running {script}\n")
+    runpy.run_path(script, run_name='__main__')
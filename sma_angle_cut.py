@@ -1,6 +1,8 @@
 import pandas as pd
-import numpy as np
-from pathlib import Path
+from universe import (
+    load_universe, load_sma_angle, compute_angle_mask, stock_list_mask,
+    find_first_valid_date, find_date_rows
+)
 
 print("="*70)
 print("SMA ANGLE BUY ZONE FILTER")
@@ -42,60 +44,28 @@ print(f"  Date range: {volume_cut_df['date'].iloc[0].date()} to {volume_cut_df['
 # ============================================================================
 print(f"\n📁 Reading stock data from: {DATA_FOLDER}")
 
-csv_files = list(Path(DATA_FOLDER).glob('*.csv'))
-
-# Filter out non-stock files
-stock_files = [
-    f for f in csv_files
-    if f.stem not in ['NIFTY500_INDEX', 'summary_report', 'combined_data']
-]
-
-print(f"✓ Found {len(stock_files)} stock CSV files")
-
-# Dictionary to store stock data with SMAs and angle
-stock_data = {}
-
-print(f"\n📊 Loading stock data and calculating SMAs + Angle...")
-for i, csv_file in enumerate(stock_files, 1):
-    stock_name = csv_file.stem
+# Wide (dates x symbols) arrays, shared with the other pipeline scripts
+universe = load_universe(DATA_FOLDER)
 
-    try:
-        # Read CSV with datetime index
-        df = pd.read_csv(csv_file, index_col='datetime', parse_dates=True)
+print(f"\n📈 Calculating SMAs + Angle...")
 
-        if 'close' in df.columns and not df.empty:
-            # Calculate 200-day and 50-day SMAs
-            df['ma200'] = df['close'].rolling(window=SMA_200_WINDOW).mean()
-            df['ma50'] = df['close'].rolling(window=SMA_50_WINDOW).mean()
+# Rolling SMAs over each stock's own closes (cached across runs)
+ma50, ma200, angle = load_sma_angle(DATA_FOLDER, SMA_50_WINDOW, SMA_200_WINDOW)
 
-            # Calculate angle of 200 SMA
-            # angle = arctan((ma200 - ma200[1]) / (close * 0.01)) * 180 / π
-            ma200_diff = df['ma200'] - df['ma200'].shift(1)
-            normalized_slope = ma200_diff / (df['close'] * 0.01)
-            df['angle'] = np.arctan(normalized_slope) * 180 / np.pi
-
-            # Store only necessary columns
-            stock_data[stock_name] = df[['close', 'ma200', 'ma50', 'angle']].copy()
-
-            if i % 50 == 0:
-                print(f"   Processed {i}/{len(stock_files)} stocks...")
-    except Exception as e:
-        print(f"   ⚠ Error loading {stock_name}: {e}")
-
-print(f"✓ Successfully loaded {len(stock_data)} stocks with SMA and angle data")
+print(f"✓ Successfully loaded {len(universe.symbols)} stocks with SMA and angle data")
 
 # ============================================================================
 # STEP 3: Find the first valid month-end (after 200 days of data)
 # ============================================================================
 print(f"\n📅 Finding first valid month-end date (after {SMA_200_WINDOW} days)...")
 
-# Get the earliest date across all stocks
-min_date = min([df.index.min() for df in stock_data.values()])
+# Get the earliest date across all stocks (dates are sorted)
+min_date = universe.dates[0]
 print(f"  Earliest stock data: {min_date.date()}")
 
-# Calculate the first date where we have 200 days of data
-# This is approximately min_date + 200 trading days (accounting for weekends)
-first_valid_date = min_date + pd.Timedelta(days=SMA_200_WINDOW * 1.5)
+# First date on which any stock has SMA_200_WINDOW closes of its own, read off
+# the SMA matrix itself
+first_valid_date = find_first_valid_date(ma200, universe.dates)
 
 # Find the first month-end in volume_cut that's after this date
 volume_cut_filtered = volume_cut_df[volume_cut_df['date'] >= first_valid_date].copy()
@@ -112,59 +82,35 @@ print(f"    - Angle > {ANGLE_THRESHOLD}°")
 print(f"    - Close > 50 SMA")
 print(f"    - Close > 200 SMA")
 
-results = []
-
-for idx, row in volume_cut_filtered.iterrows():
-    month_end_date = row['date']
-    volume_filtered_stocks = row['stocks']
-
-    # Skip if no stocks passed volume filter
-    if pd.isna(volume_filtered_stocks) or volume_filtered_stocks == '':
-        results.append({
-            'date': month_end_date.strftime('%Y-%m-%d'),
-            'stocks': '',
-            'count': 0
-        })
-        continue
-
-    # Get list of stocks that passed volume filter
-    volume_stocks_list = [s.strip() for s in volume_filtered_stocks.split(',')]
-
-    # List to store stocks that pass buy zone conditions
-    buy_zone_stocks = []
-
-    for stock_name in volume_stocks_list:
-        # Check if we have data for this stock
-        if stock_name in stock_data:
-            df = stock_data[stock_name]
-
-            # Find the matching date (accounting for time component)
-            matching_dates = df.index[df.index.date == month_end_date.date()]
-
-            if len(matching_dates) > 0:
-                actual_date = matching_dates[0]
-
-                close_price = df.loc[actual_date, 'close']
-                ma200 = df.loc[actual_date, 'ma200']
-                ma50 = df.loc[actual_date, 'ma50']
-                angle = df.loc[actual_date, 'angle']
-
-                # Buy Zone Conditions:
-                # 1. angle > angleThreshold
-                # 2. close > ma50
-                # 3. close > ma200
-                if (pd.notna(angle) and pd.notna(ma200) and pd.notna(ma50) and
-                    angle > ANGLE_THRESHOLD and
-                    close_price > ma50 and
-                    close_price > ma200):
-                    buy_zone_stocks.append(stock_name)
-
-    # Add to results
-    results.append({
-        'date': month_end_date.strftime('%Y-%m-%d'),
-        'stocks': ', '.join(sorted(buy_zone_stocks)),
-        'count': len(buy_zone_stocks)
-    })
+# Rows of all month-ends in the stock arrays, found by binary search
+# (-1 if not a trading day)
+row_pos = find_date_rows(universe.dates, volume_cut_filtered['date'])
+
+# (month-ends x symbols) mask of the stocks that passed the volume filter
+# and have data, parsed in one vectorized pass
+volume_mask = stock_list_mask(volume_cut_filtered['stocks'], universe.symbols)
+
+# Buy Zone Conditions, evaluated only on the month-end rows (NaN compares
+# False, so missing data never passes):
+# 1. angle > angleThreshold
+# 2. close > ma50
+# 3. close > ma200
+in_buy_zone = compute_angle_mask(
+    universe.closes, ma50, ma200, angle, row_pos, ANGLE_THRESHOLD
+)
+
+# Stocks that pass both filters; month-ends that are not trading days
+# keep no stocks
+buy_zone_mask = volume_mask & in_buy_zone
+buy_zone_mask[row_pos < 0] = False
+
+# Symbols are pre-sorted, so each row's names come out sorted; counts
+# are a single reduction
+results = {
+    'date': volume_cut_filtered['date'].dt.strftime('%Y-%m-%d').to_numpy(),
+    'stocks': [', '.join(universe.symbols[row].tolist()) for row in buy_zone_mask],
+    'count': buy_zone_mask.sum(axis=1),
+}
 
 print(f"✓ Processed {len(volume_cut_filtered)} month-end dates")
 
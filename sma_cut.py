@@ -1,7 +1,7 @@
 import pandas as pd
-import os
-from pathlib import Path
-from datetime import datetime
+from universe import (
+    load_universe, load_sma_angle, stock_list_mask, find_first_valid_date, find_date_rows
+)
 
 print("="*70)
 print("200 SMA CUT GENERATOR")
@@ -20,6 +20,9 @@ VOLUME_CUT_FILE = 'volume_cut_5lakh.csv'
 # SMA window (200 trading days)
 SMA_WINDOW = 200
 
+# Companion SMA window computed by the shared SMA kernel
+SMA_50_WINDOW = 50
+
 # Output file name
 OUTPUT_FILE = '200sma_cut.csv'
 
@@ -39,53 +42,29 @@ print(f"  Date range: {volume_cut_df['date'].iloc[0].date()} to {volume_cut_df['
 # ============================================================================
 print(f"\n📁 Reading stock data from: {DATA_FOLDER}")
 
-csv_files = list(Path(DATA_FOLDER).glob('*.csv'))
-
-# Filter out non-stock files
-stock_files = [
-    f for f in csv_files
-    if f.stem not in ['NIFTY500_INDEX', 'summary_report', 'combined_data']
-]
-
-print(f"✓ Found {len(stock_files)} stock CSV files")
-
-# Dictionary to store stock data with SMA
-stock_data = {}
-
-print(f"\n📊 Loading stock data and calculating {SMA_WINDOW}-day SMA...")
-for i, csv_file in enumerate(stock_files, 1):
-    stock_name = csv_file.stem
-
-    try:
-        # Read CSV with datetime index
-        df = pd.read_csv(csv_file, index_col='datetime', parse_dates=True)
-
-        if 'close' in df.columns and not df.empty:
-            # Calculate 200-day SMA
-            df['sma_200'] = df['close'].rolling(window=SMA_WINDOW).mean()
+# Wide (dates x symbols) arrays, shared with the other pipeline scripts
+universe = load_universe(DATA_FOLDER)
 
-            # Store only close and SMA columns
-            stock_data[stock_name] = df[['close', 'sma_200']].copy()
+print(f"\n📈 Calculating {SMA_WINDOW}-day SMA...")
 
-            if i % 50 == 0:
-                print(f"   Processed {i}/{len(stock_files)} stocks...")
-    except Exception as e:
-        print(f"   ⚠ Error loading {stock_name}: {e}")
+# Rolling SMA over each stock's own closes (cached across runs; the 50 SMA
+# and angle come along from the same kernel pass)
+_, sma_200, _ = load_sma_angle(DATA_FOLDER, SMA_50_WINDOW, SMA_WINDOW)
 
-print(f"✓ Successfully loaded {len(stock_data)} stocks with SMA data")
+print(f"✓ Successfully loaded {len(universe.symbols)} stocks with SMA data")
 
 # ============================================================================
 # STEP 3: Find the first valid month-end (after 200 days of data)
 # ============================================================================
 print(f"\n📅 Finding first valid month-end date (after {SMA_WINDOW} days)...")
 
-# Get the earliest date across all stocks
-min_date = min([df.index.min() for df in stock_data.values()])
+# Get the earliest date across all stocks (dates are sorted)
+min_date = universe.dates[0]
 print(f"  Earliest stock data: {min_date.date()}")
 
-# Calculate the first date where we have 200 days of data
-# This is approximately min_date + 200 trading days
-first_valid_date = min_date + pd.Timedelta(days=SMA_WINDOW * 1.5)  # Rough estimate accounting for weekends
+# First date on which any stock has SMA_WINDOW closes of its own, read off
+# the SMA matrix itself
+first_valid_date = find_first_valid_date(sma_200, universe.dates)
 
 # Find the first month-end in volume_cut that's after this date
 volume_cut_filtered = volume_cut_df[volume_cut_df['date'] >= first_valid_date].copy()
@@ -98,51 +77,30 @@ print(f"  Total valid month-ends: {len(volume_cut_filtered)}")
 # ============================================================================
 print(f"\n🔍 Filtering stocks where Close > {SMA_WINDOW}-day SMA on month-ends...")
 
-results = []
-
-for idx, row in volume_cut_filtered.iterrows():
-    month_end_date = row['date']
-    volume_filtered_stocks = row['stocks']
-
-    # Skip if no stocks passed volume filter
-    if pd.isna(volume_filtered_stocks) or volume_filtered_stocks == '':
-        results.append({
-            'date': month_end_date.strftime('%Y-%m-%d'),
-            'stocks': '',
-            'count': 0
-        })
-        continue
-
-    # Get list of stocks that passed volume filter
-    volume_stocks_list = [s.strip() for s in volume_filtered_stocks.split(',')]
-
-    # List to store stocks that also pass SMA filter
-    sma_passing_stocks = []
-
-    for stock_name in volume_stocks_list:
-        # Check if we have data for this stock
-        if stock_name in stock_data:
-            df = stock_data[stock_name]
-
-            # Find the closest date in the stock's index (month-end might not be exact due to time component)
-            # Look for dates on the same day as month_end_date
-            matching_dates = df.index[df.index.date == month_end_date.date()]
-
-            if len(matching_dates) > 0:
-                actual_date = matching_dates[0]  # Use the first match (should only be one per day)
-                close_price = df.loc[actual_date, 'close']
-                sma_200 = df.loc[actual_date, 'sma_200']
-
-                # Check if close > SMA (and SMA is not NaN)
-                if pd.notna(sma_200) and close_price > sma_200:
-                    sma_passing_stocks.append(stock_name)
-
-    # Add to results
-    results.append({
-        'date': month_end_date.strftime('%Y-%m-%d'),
-        'stocks': ', '.join(sorted(sma_passing_stocks)),
-        'count': len(sma_passing_stocks)
-    })
+# Rows of all month-ends in the stock arrays, found by binary search
+# (-1 if not a trading day)
+row_pos = find_date_rows(universe.dates, volume_cut_filtered['date'])
+
+# (month-ends x symbols) mask of the stocks that passed the volume filter
+# and have data, parsed in one vectorized pass
+volume_mask = stock_list_mask(volume_cut_filtered['stocks'], universe.symbols)
+
+# Close > SMA is only evaluated on the month-end rows; a NaN SMA (or no
+# close) compares False, which doubles as the has-data membership test
+above_sma = universe.closes[row_pos] > sma_200[row_pos]
+
+# Stocks that pass both filters; month-ends that are not trading days
+# keep no stocks
+sma_passing_mask = volume_mask & above_sma
+sma_passing_mask[row_pos < 0] = False
+
+# Symbols are pre-sorted, so each row's names come out sorted; counts
+# are a single reduction
+results = {
+    'date': volume_cut_filtered['date'].dt.strftime('%Y-%m-%d').to_numpy(),
+    'stocks': [', '.join(universe.symbols[row].tolist()) for row in sma_passing_mask],
+    'count': sma_passing_mask.sum(axis=1),
+}
 
 print(f"✓ Processed {len(volume_cut_filtered)} month-end dates")
 
@@ -0,0 +1,429 @@
+import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import hashlib
+import math
+import os
+from pathlib import Path
+from functools import lru_cache
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from _njit import njit, prange
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Files in the data folder that are not individual stocks
+NON_STOCK_FILES = ['NIFTY500_INDEX', 'summary_report', 'combined_data']
+
+# Threads for parallel CSV loading (the parser releases the GIL)
+LOAD_WORKERS = (os.cpu_count() or 1) * 2
+
+# Print progress every 50 stocks while loading
+VERBOSE = False
+
+# Columns read from each stock CSV ('YYYY-MM-DD HH:MM:SS' datetimes are
+# inferred as timestamps by pyarrow)
+STOCK_CSV_CONVERT_OPTIONS = pacsv.ConvertOptions(
+    include_columns=['datetime', 'close', 'volume'],
+    column_types={'close': pa.float32(), 'volume': pa.float32()}
+)
+
+# Root folder for the parquet cache of the wide close/volume frames
+CACHE_ROOT = Path('cache')
+
+# Wide stock data shared by the pipeline scripts: closes/volumes are
+# (dates x symbols) float32 ndarrays with NaN where a stock has no bar
+# that day (float32 halves memory traffic for the rolling-window work;
+# volumes stay floating point so missing days can be NaN)
+Universe = namedtuple(
+    'Universe',
+    ['closes', 'volumes', 'dates', 'symbols', 'month_end_rows', 'fingerprint']
+)
+
+
+def load_stock_csv(csv_file):
+    """Read the close/volume columns of one stock CSV, returning (name, df, error)"""
+    try:
+        table = pacsv.read_csv(csv_file, convert_options=STOCK_CSV_CONVERT_OPTIONS)
+        df = table.to_pandas(split_blocks=True, self_destruct=True)
+        return csv_file.stem, df.set_index('datetime'), None
+    except Exception as e:
+        return csv_file.stem, None, e
+
+
+def find_month_end_rows(dates):
+    """Row positions of the last trading day of each month in sorted dates"""
+    # A month ends wherever the packed int64 period changes, plus the last row
+    period = dates.to_period('M').asi8
+    if period.size == 0:
+        return np.empty(0, dtype=np.int64)
+    return np.r_[np.flatnonzero(np.diff(period)), period.size - 1].astype(np.int64)
+
+
+@lru_cache(maxsize=None)
+def load_universe(data_folder):
+    """Load every stock CSV in data_folder as wide (dates x symbols) arrays
+
+    Reads cache/<data_folder>/*.parquet when it was built from the current
+    set of stock CSVs (same names, sizes and mtimes), otherwise parses the
+    CSVs and refreshes the cache. The arrays are
+    shared between callers and must not be modified in place.
+    """
+    csv_files = list(Path(data_folder).glob('*.csv'))
+
+    # Filter out non-stock files
+    stock_files = [f for f in csv_files if f.stem not in NON_STOCK_FILES]
+
+    print(f"✓ Found {len(stock_files)} stock CSV files")
+
+    cache_folder = CACHE_ROOT / data_folder
+    closes_cache = cache_folder / 'closes.parquet'
+    volumes_cache = cache_folder / 'volumes.parquet'
+    fingerprint_cache = cache_folder / 'fingerprint'
+
+    # Hash of the input files; catches added, removed or rewritten CSVs
+    # (including ones with older mtimes), and invalidates derived caches
+    stats = {f.name: f.stat() for f in stock_files}
+    fingerprint = hashlib.sha1(repr(sorted(
+        (name, st.st_mtime_ns, st.st_size) for name, st in stats.items()
+    )).encode()).hexdigest()
+
+    # Use the parquet cache only if it was built from the same files
+    cache_is_fresh = (
+        closes_cache.exists() and volumes_cache.exists()
+        and fingerprint_cache.exists()
+        and fingerprint_cache.read_text() == fingerprint
+    )
+
+    if cache_is_fresh:
+        print(f"\n📊 Loading cached stock data from {cache_folder}/...")
+        closes = pd.read_parquet(closes_cache)
+        volumes = pd.read_parquet(volumes_cache)
+    else:
+        # Dictionary to store stock data
+        stock_data = {}
+
+        print("\n📊 Loading stock data...")
+        with ThreadPoolExecutor(max_workers=LOAD_WORKERS) as executor:
+            results_iter = executor.map(load_stock_csv, stock_files)
+
+            for i, (stock_name, df, error) in enumerate(results_iter, 1):
+                if error is not None:
+                    print(f"   ⚠ Error loading {stock_name}: {error}")
+                    continue
+
+                if not df.empty:
+                    stock_data[stock_name] = df
+
+                if VERBOSE and i % 50 == 0:
+                    print(f"   Loaded {i}/{len(stock_files)} stocks...")
+
+        # Combine into wide DataFrames (index=date, columns=stock)
+        closes = pd.concat(
+            {stock_name: df['close'] for stock_name, df in stock_data.items()}, axis=1
+        ).sort_index()
+        volumes = pd.concat(
+            {stock_name: df['volume'] for stock_name, df in stock_data.items()}, axis=1
+        ).sort_index()
+
+        # Cache both frames so later runs can skip CSV parsing
+        cache_folder.mkdir(parents=True, exist_ok=True)
+        closes.to_parquet(closes_cache, compression='snappy')
+        volumes.to_parquet(volumes_cache, compression='snappy')
+
+        # Written last, so an interrupted write is never mistaken as fresh
+        fingerprint_cache.write_text(fingerprint)
+        print(f"✓ Cached stock data to {cache_folder}/")
+
+    # Sorted symbols keep per-month stock lists ordered without re-sorting
+    closes = closes.sort_index(axis=1)
+    volumes = volumes.reindex(columns=closes.columns)
+
+    # Key rows by calendar date (drops the intraday time component). The
+    # unit is pinned because the CSV path yields datetime64[s] and the
+    # parquet round-trip datetime64[ms], and the SMA cache compares asi8
+    dates = closes.index.normalize().as_unit('ns')
+
+    return Universe(
+        closes=closes.to_numpy(dtype=np.float32),
+        volumes=volumes.to_numpy(dtype=np.float32),
+        dates=dates,
+        symbols=closes.columns.to_numpy(dtype=str),
+        month_end_rows=find_month_end_rows(dates),
+        fingerprint=fingerprint,
+    )
+
+
+# Explicit float32 signature (read-only input, as shared by load_universe);
+# compiled eagerly and cached in __pycache__ so later runs skip the JIT
+SMA_ANGLE_SIGNATURE = (
+    "UniTuple(float32[:, :], 3)"
+    "(Array(float32, 2, 'A', readonly=True), int64, int64)"
+)
+
+
+@njit(SMA_ANGLE_SIGNATURE, parallel=True, cache=True)
+def sma_angle_kernel(C, w50, w200):
+    """Rolling 50/200 SMAs and 200 SMA angle for each column of C
+
+    SMAs are rolling sums over each stock's own closes, so days a stock
+    has no close (NaN) are skipped rather than breaking the window. Cells
+    without enough history, or without a close, are NaN.
+    """
+    n_rows, n_cols = C.shape
+    ma50_out = np.full((n_rows, n_cols), np.nan, dtype=np.float32)
+    ma200_out = np.full((n_rows, n_cols), np.nan, dtype=np.float32)
+    angle_out = np.full((n_rows, n_cols), np.nan, dtype=np.float32)
+
+    for j in prange(n_cols):
+        history = np.empty(n_rows)
+        n = 0
+        sum50 = 0.0
+        sum200 = 0.0
+        prev_ma200 = 0.0
+
+        for t in range(n_rows):
+            close = C[t, j]
+            if np.isnan(close):
+                continue
+
+            # One add + one subtract per step for each rolling sum
+            history[n] = close
+            n += 1
+            sum50 += close
+            sum200 += close
+            if n > w50:
+                sum50 -= history[n - 1 - w50]
+            if n > w200:
+                sum200 -= history[n - 1 - w200]
+
+            if n >= w50:
+                ma50_out[t, j] = sum50 / w50
+
+            if n >= w200:
+                ma200 = sum200 / w200
+                ma200_out[t, j] = ma200
+
+                # angle = arctan((ma200 - ma200[1]) / (close * 0.01)) * 180 / π
+                if n > w200:
+                    angle_out[t, j] = math.atan((ma200 - prev_ma200) / (close * 0.01)) * 180 / math.pi
+
+                prev_ma200 = ma200
+
+    return ma50_out, ma200_out, angle_out
+
+
+@lru_cache(maxsize=None)
+def load_sma_angle(data_folder, w50, w200):
+    """50/200 SMA and 200 SMA angle matrices aligned with load_universe(data_folder)
+
+    Results are cached in cache/<data_folder>/sma_<w50>_<w200>.npz and
+    reused while the universe fingerprint is unchanged.
+    """
+    universe = load_universe(data_folder)
+    sma_cache = CACHE_ROOT / data_folder / f'sma_{w50}_{w200}.npz'
+
+    if sma_cache.exists():
+        with np.load(sma_cache) as z:
+            if (str(z['fingerprint']) == universe.fingerprint
+                    and np.array_equal(z['dates'], universe.dates.asi8)
+                    and np.array_equal(z['symbols'], universe.symbols)):
+                print(f"✓ Loaded cached SMAs + Angle from {sma_cache}")
+                return z['ma50'], z['ma200'], z['angle']
+
+    ma50, ma200, angle = sma_angle_kernel(universe.closes, w50, w200)
+
+    sma_cache.parent.mkdir(parents=True, exist_ok=True)
+    np.savez(
+        sma_cache,
+        ma50=ma50,
+        ma200=ma200,
+        angle=angle,
+        dates=universe.dates.asi8,
+        symbols=universe.symbols,
+        fingerprint=np.array(universe.fingerprint),
+    )
+    print(f"✓ Cached SMAs + Angle to {sma_cache}")
+
+    return ma50, ma200, angle
+
+
+def find_date_rows(dates, targets):
+    """Row positions of targets in sorted dates (-1 where not a trading day)"""
+    # Binary search on the int64 epoch values; no Timestamp objects
+    dates_i8 = dates.asi8
+    targets_i8 = pd.DatetimeIndex(targets).as_unit(dates.unit).asi8
+    if dates_i8.size == 0:
+        return np.full(targets_i8.size, -1, dtype=np.int64)
+
+    rows = np.searchsorted(dates_i8, targets_i8)
+    clipped = np.minimum(rows, dates_i8.size - 1)
+    found = (rows < dates_i8.size) & (dates_i8[clipped] == targets_i8)
+    return np.where(found, rows, -1)
+
+
+def find_first_valid_date(values, dates):
+    """Date of the first row of a (dates x symbols) array with any non-NaN value"""
+    valid = ~np.isnan(values).all(axis=1)
+    return dates[valid.argmax()] if valid.any() else pd.NaT
+
+
+def load_index_close(index_file):
+    """Close prices of an index CSV keyed by calendar date"""
+    index_df = pd.read_csv(index_file, index_col='datetime', parse_dates=True)
+    index_close = index_df['close']
+    index_close.index = index_close.index.normalize()
+    return index_close
+
+
+def stock_list_mask(stock_lists, symbols):
+    """(rows x symbols) mask of the comma-separated stock names in each row
+
+    Every list is split in one vectorized pass and all names are resolved
+    with a single hashed lookup. Empty/NaN lists and names not in symbols
+    are ignored.
+    """
+    names = (
+        pd.Series(stock_lists).reset_index(drop=True)
+        .fillna('').str.split(',').explode().str.strip()
+    )
+    cols = pd.Index(symbols).get_indexer(names)
+    found = cols >= 0
+
+    mask = np.zeros((len(stock_lists), len(symbols)), dtype=bool)
+    mask[names.index[found], cols[found]] = True
+    return mask
+
+
+# Explicit float32 signature (read-only input, as shared by load_universe);
+# compiled eagerly and cached in __pycache__ so later runs skip the JIT
+ROLLING_MEAN_SIGNATURE = "float64[:, :](Array(float32, 2, 'A', readonly=True), int64)"
+
+
+@njit(ROLLING_MEAN_SIGNATURE, parallel=True, cache=True)
+def rolling_mean_kernel(V, window):
+    """Rolling mean over each column's own values (NaN rows are skipped)"""
+    n_rows, n_cols = V.shape
+    out = np.full((n_rows, n_cols), np.nan)
+
+    for j in prange(n_cols):
+        history = np.empty(n_rows)
+        n = 0
+        total = 0.0
+
+        for t in range(n_rows):
+            value = V[t, j]
+            if np.isnan(value):
+                continue
+
+            history[n] = value
+            n += 1
+            total += value
+            if n > window:
+                total -= history[n - 1 - window]
+
+            if n >= window:
+                out[t, j] = total / window
+
+    return out
+
+
+def rolling_mean(values, window):
+    """Rolling mean down each column of a (dates x symbols) array
+
+    Like the SMAs, the window runs over each stock's own bars, so a stock
+    missing a day on the wide index is not dropped for the next window.
+    Cells without enough history, or without a value, are NaN.
+    """
+    return rolling_mean_kernel(values, window)
+
+
+def compute_volume_mask(volumes, rows, window, threshold):
+    """(rows x symbols) mask of stocks whose average volume exceeds threshold"""
+    # NaN > x is False under IEEE comparison, so no separate notna test
+    return rolling_mean(volumes, window)[rows] > threshold
+
+
+def compute_angle_mask(closes, ma50, ma200, angle, rows, threshold):
+    """(rows x symbols) mask of stocks in the SMA-angle buy zone"""
+    # One fused AND over the three comparisons (NaN compares False)
+    close = closes[rows]
+    return np.logical_and.reduce([
+        angle[rows] > threshold,
+        close > ma50[rows],
+        close > ma200[rows],
+    ])
+
+
+def compute_rs_topk(closes, dates, rows, candidates, index_close, lookback_months, top_n):
+    """Top-N relative strength stocks vs the index for each of the given rows
+
+    candidates is a (rows x symbols) mask of eligible stocks. Returns one
+    (column_indices, rs_ratios) pair per row, ordered by RS descending and
+    keeping only RS >= 1. Rows without index or price data for both dates,
+    or with a zero index return, get empty picks.
+    """
+    # Row of the last trading day on or before the same date
+    # lookback_months earlier (-1 if before the data)
+    lookback_rows = dates.get_indexer(
+        dates - pd.DateOffset(months=lookback_months), method='pad'
+    )
+
+    index_values = index_close.to_numpy()
+    index_lookback_rows = index_close.index.get_indexer(
+        index_close.index - pd.DateOffset(months=lookback_months), method='pad'
+    )
+    index_rows = index_close.index.get_indexer(dates[rows])
+
+    no_picks = (np.empty(0, dtype=np.int64), np.empty(0))
+    picks = []
+
+    for i, r in enumerate(rows):
+        ir = index_rows[i]
+        index_past_r = index_lookback_rows[ir] if ir >= 0 else -1
+        past_r = lookback_rows[r]
+
+        if ir < 0 or index_past_r < 0 or past_r < 0:
+            picks.append(no_picks)
+            continue
+
+        index_past = index_values[index_past_r]
+        index_return = (index_values[ir] - index_past) / index_past
+
+        # Skip if index return is zero (to avoid division by zero)
+        if index_return == 0:
+            picks.append(no_picks)
+            continue
+
+        # Relative strength for all candidate stocks at once
+        cand_cols = np.flatnonzero(candidates[i])
+        current_prices = closes[r, cand_cols]
+        past_prices = closes[past_r, cand_cols]
+        rs = ((current_prices - past_prices) / past_prices) / index_return
+
+        # Only include stocks with RS ratio >= 1 (NaN compares False)
+        keep = rs >= 1
+        cand_cols = cand_cols[keep]
+        rs = rs[keep]
+
+        # Take top N by RS ratio (partition, then sort only those N)
+        k = min(top_n, rs.size)
+        top = np.argpartition(-rs, k - 1)[:k] if k > 0 else np.empty(0, dtype=np.int64)
+        top = top[np.argsort(-rs[top], kind='stable')]
+
+        picks.append((cand_cols[top], rs[top]))
+
+    return picks
+
+
+def format_rs_picks(symbols, cols, rs):
+    """Format picks as "STOCK1 (ratio), STOCK2 (ratio), ..." """
+    # Vectorized string building; only the final join runs in Python
+    parts = np.char.add(
+        np.char.add(symbols[cols], ' ('),
+        np.char.add(np.char.mod('%.2f', rs), ')')
+    )
+    return ', '.join(parts.tolist())